@@ -1,7 +1,12 @@
 import os
 import sys
+import hashlib
 import argparse
-from typing import List, Tuple, Set
+from collections import deque
+from contextlib import nullcontext
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from operator import attrgetter
+from typing import BinaryIO, Dict, FrozenSet, Iterator, List, Optional, Tuple
 
 
 def parse_args():
@@ -22,6 +27,12 @@ Examples:
 
   # Exclude specific directories and files:
   combiner.py /path/to/project output.txt -e venv build dist config.ini .env
+
+  # Write the content of identical files only once:
+  combiner.py /path/to/project output.txt --dedup
+
+  # Scan directories and read files in parallel (e.g. on a network file system):
+  combiner.py /path/to/project output.txt -j 8 --async-reads
         """,
     )
     parser.add_argument("project_path", help="Path to the project directory")
@@ -30,14 +41,14 @@ Examples:
         "-f",
         "--file-types",
         nargs="+",
-        help="File extensions to include (e.g., .py .cpp .h). If not specified, includes all files",
+        help="File extensions to include (e.g., .py .cpp .h or .py,.cpp,.h). If not specified, includes all files",
     )
     parser.add_argument(
         "-e",
         "--exclude",
         nargs="+",
         default=["venv", "__pycache__", "resources", ".git", ".gitignore"],
-        help="Directories and files to exclude (default: venv __pycache__ .git .gitignore)",
+        help="Directories and files to exclude (e.g., venv build or venv,build; default: venv __pycache__ .git .gitignore)",
     )
     parser.add_argument(
         "-st",
@@ -45,148 +56,389 @@ Examples:
         action="store_true",
         help="Generate tree structure in a separate file",
     )
-    return parser.parse_args()
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=positive_int,
+        default=1,
+        help="Number of threads used to scan directories (default: 1)",
+    )
+    parser.add_argument(
+        "--async-reads",
+        action="store_true",
+        help="Read files ahead on a thread pool (helps on slow or network storage)",
+    )
+    parser.add_argument(
+        "--dedup",
+        action="store_true",
+        help="Replace files identical to an earlier one with a reference to it",
+    )
+    args = parser.parse_args()
 
+    # Accept comma separated values as well and convert once into the types
+    # the scan expects: a set for name lookups, a tuple for str.endswith
+    args.exclude = frozenset(_split_values(args.exclude))
+    args.file_types = tuple(dict.fromkeys(_split_values(args.file_types or ())))
+    return args
 
-def should_skip_path(path: str, exclude_items: Set[str]) -> bool:
-    """Check if path should be skipped based on excluded items"""
-    path_parts = path.split(os.sep)
-    return any(excluded in path_parts for excluded in exclude_items)
 
+def _split_values(values: List[str]) -> Iterator[str]:
+    """Flatten space and comma separated option values"""
+    for value in values:
+        yield from filter(None, value.split(","))
 
-def should_skip_file(filename: str, exclude_items: Set[str]) -> bool:
-    """Check if file should be skipped based on excluded items"""
-    return filename in exclude_items
+
+def positive_int(value: str) -> int:
+    """Argument type for options that take a count of at least 1"""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError("must be a positive integer")
+    if number < 1:
+        raise argparse.ArgumentTypeError("must be a positive integer")
+    return number
 
 
-def is_included_file(filename: str, file_types: Set[str]) -> bool:
-    """Check if file should be included based on its extension"""
-    if not file_types:  # If no file types specified, include all files
-        return True
-    return any(filename.endswith(ext) for ext in file_types)
+# Directories with more subdirectories than this are listed in parallel
+FAN_OUT_MIN = 4
 
+_by_name = attrgetter("name")
 
-def scan_directory(
-    path: str, exclude_items: Set[str], file_types: Set[str]
-) -> List[Tuple[str, str]]:
+
+def _list_dir(
+    path: str, exclude_items: FrozenSet[str], file_types: Tuple[str, ...]
+) -> List[Tuple[os.DirEntry, Optional[bool]]]:
+    """
+    Return the (entry, is_dir) pairs of a directory sorted by name,
+    excluding specified directories and files, and filtering by file types.
+    is_dir is None for entries that are only shown in the tree
+    """
+    try:
+        with os.scandir(path) as it:
+            entries = sorted(it, key=_by_name)
+    except PermissionError:
+        return []
+
+    endswith = str.endswith
+    filtered_entries = []
+    for e in entries:
+        name = e.name
+        if name in exclude_items:
+            continue
+        if e.is_dir(follow_symlinks=False):
+            filtered_entries.append((e, True))
+        elif e.is_symlink() and e.is_dir():
+            # Symlinked directories are shown but never descended into
+            filtered_entries.append((e, None))
+        elif not file_types or endswith(name, file_types):
+            # Anything but a regular file (e.g. a dangling symlink) is shown
+            # in the tree without being combined
+            filtered_entries.append((e, False if e.is_file() else None))
+    return filtered_entries
+
+
+def walk_once(
+    root: str,
+    exclude_items: FrozenSet[str],
+    file_types: Tuple[str, ...],
+    executor: Optional[Executor] = None,
+) -> Tuple[List[str], List[Tuple[str, str]]]:
     """
-    Scan directory and return list of (file_path, relative_path) tuples,
-    excluding specified directories and files, and filtering by file types
+    Walk the project once and return both the tree structure (similar to
+    tree command) and the list of (file_path, relative_path) tuples,
+    excluding specified directories and files, and filtering by file types.
+    Files are listed in the same order as they appear in the tree. If an
+    executor is given, subdirectories of wide directories are listed ahead
+    on it while the tree is rendered
     """
+    tree_lines = [f"Directory structure of: {root}"]
     file_paths = []
-    for root, _, files in os.walk(path):
-        # Skip excluded directories
-        if should_skip_path(root, exclude_items):
+    add_file = file_paths.append
+    sep = os.sep
+
+    # Directory path -> future of its listing, submitted by its parent
+    pending: Dict[str, Future] = {}
+
+    def _list_ahead(path: str) -> List[Tuple[os.DirEntry, Optional[bool]]]:
+        entries = _list_dir(path, exclude_items, file_types)
+        subdirs = [e.path for e, is_dir in entries if is_dir]
+        # Only fan out where there is enough work to pay for the tasks
+        if len(subdirs) > FAN_OUT_MIN:
+            for subdir in subdirs:
+                pending[subdir] = executor.submit(_list_ahead, subdir)
+        return entries
+
+    def list_dir(path: str) -> List[Tuple[os.DirEntry, Optional[bool]]]:
+        if executor is None:
+            return _list_dir(path, exclude_items, file_types)
+        # A parent's listing returns only after it submitted its children
+        future = pending.pop(path, None)
+        return future.result() if future is not None else _list_ahead(path)
+
+    # Explicit DFS stack of (tree_line, path, is_dir, child_prefix, rel_path)
+    # where rel_path of a directory already ends with a separator and is_dir
+    # is None for tree-only leaves. Entries are pushed in reverse so they are
+    # popped in sorted order
+    stack = [(None, root, True, "", "")]
+    push = stack.append
+    while stack:
+        line, path, is_dir, prefix, rel_path = stack.pop()
+        if line is not None:
+            tree_lines.append(line)
+        if not is_dir:
+            if is_dir is not None:
+                add_file((path, rel_path))
+            continue
+
+        filtered_entries = list_dir(path)
+        if not filtered_entries:
             continue
 
-        for file in files:
-            # Skip excluded files and check file type
-            if not should_skip_file(file, exclude_items) and is_included_file(
-                file, file_types
-            ):
-                abs_path = os.path.join(root, file)
-                rel_path = os.path.relpath(abs_path, path)
-                file_paths.append((abs_path, rel_path))
-    return sorted(file_paths)
+        # The last entry gets the closing branch, the others the open one
+        last, is_last_dir = filtered_entries.pop()
+        push(
+            (
+                f"{prefix}└── {last.name}",
+                last.path,
+                is_last_dir,
+                prefix + "    ",
+                rel_path + last.name + sep if is_last_dir else rel_path + last.name,
+            )
+        )
+        branch = prefix + "├── "
+        child_prefix = prefix + "│   "
+        for e, is_dir in reversed(filtered_entries):
+            # Relative paths are built up during descent instead of relpath
+            child_rel = rel_path + e.name
+            push(
+                (
+                    branch + e.name,
+                    e.path,
+                    is_dir,
+                    child_prefix,
+                    child_rel + sep if is_dir else child_rel,
+                )
+            )
+
+    return tree_lines, file_paths
+
 
+# Maximum number of source files being read ahead of the writer
+READ_AHEAD = 64
 
-def generate_tree(
-    path: str, exclude_items: Set[str], file_types: Set[str]
-) -> List[str]:
+# Buffer size for the output files and chunked copies; the 8 KiB default
+# turns large sequential writes into far too many small syscalls
+IO_BUFFER = 1 << 20
+
+# Files larger than this are not read ahead but copied by the writer
+INLINE_MAX = 1 << 20
+
+# Linux sendfile accepts any output file; elsewhere it may require a socket
+_USE_SENDFILE = hasattr(os, "sendfile") and sys.platform.startswith("linux")
+
+
+def _read_bytes(path: str) -> Tuple[os.stat_result, Optional[bytes]]:
     """
-    Generate tree structure similar to tree command,
-    excluding specified directories and files, and showing file types
+    Read a whole file as bytes (runs on a worker thread) and return it with
+    the file's stat, or None instead of the bytes if it is too large to be
+    held in memory and should be copied instead
     """
-    tree_output = [f"Directory structure of: {path}"]
+    # Unbuffered: read() sizes a single buffer from fstat, nothing to gain
+    # from an extra copy through a BufferedReader
+    with open(path, "rb", buffering=0) as f:
+        st = os.fstat(f.fileno())
+        if st.st_size > INLINE_MAX:
+            return st, None
+        return st, f.read()
 
-    def add_to_tree(dir_path: str, prefix: str = ""):
+
+def _copy_file(src: BinaryIO, out: BinaryIO, size: int):
+    """
+    Copy the first `size` bytes of an open source file into the output.
+    The copy never goes past the size taken when the source was opened, so
+    a file that keeps growing (e.g. the output itself) cannot loop forever.
+    Errors reading the source are reported and end the copy early, errors
+    writing the output propagate
+    """
+    offset = 0
+    if _USE_SENDFILE:
+        out.flush()
+        out_fd, in_fd = out.fileno(), src.fileno()
         try:
-            entries = os.listdir(dir_path)
-        except PermissionError:
+            while offset < size:
+                sent = os.sendfile(out_fd, in_fd, offset, size - offset)
+                if sent == 0:
+                    break  # The source shrank since it was opened
+                offset += sent
             return
+        except OSError:
+            # Not supported for these files (or failed), retry the rest with
+            # a regular copy, which tells read and write errors apart
+            pass
+    while offset < size:
+        try:
+            # Seeking per chunk (one lseek per MiB) resumes where a failed
+            # sendfile stopped and keeps the seek under the same handler
+            src.seek(offset)
+            chunk = src.read(min(IO_BUFFER, size - offset))
+        except OSError as e:
+            print(f"Warning: Error reading {src.name}: {e}")
+            return
+        if not chunk:
+            break  # The source shrank since it was opened
+        out.write(chunk)
+        offset += len(chunk)
 
-        entries = sorted(entries)
-
-        # Filter out excluded directories, files, and non-matching files
-        filtered_entries = []
-        for entry in entries:
-            full_path = os.path.join(dir_path, entry)
-            if os.path.isdir(full_path):
-                if not should_skip_path(full_path, exclude_items):
-                    filtered_entries.append(entry)
-            elif not should_skip_file(entry, exclude_items) and is_included_file(
-                entry, file_types
-            ):
-                filtered_entries.append(entry)
-
-        for i, entry in enumerate(filtered_entries):
-            is_last = i == len(filtered_entries) - 1
-            current = os.path.join(dir_path, entry)
-
-            if is_last:
-                tree_output.append(f"{prefix}└── {entry}")
-                new_prefix = prefix + "    "
-            else:
-                tree_output.append(f"{prefix}├── {entry}")
-                new_prefix = prefix + "│   "
-
-            if os.path.isdir(current):
-                add_to_tree(current, new_prefix)
 
-    add_to_tree(path)
-    return tree_output
+def _digest(src: BinaryIO, size: int) -> bytes:
+    """
+    Return the SHA-256 digest of the first `size` bytes of an open file and
+    rewind it, hashing exactly the bytes that _copy_file will write
+    """
+    # Same readinto loop over a reusable buffer as hashlib.file_digest,
+    # which cannot be limited to a length
+    h = hashlib.sha256()
+    view = memoryview(bytearray(min(IO_BUFFER, size)))
+    remaining = size
+    while remaining > 0:
+        n = src.readinto(view[:remaining])
+        if not n:
+            break  # The source shrank since it was opened
+        h.update(view[:n])
+        remaining -= n
+    src.seek(0)
+    return h.digest()
+
+
+def _read_ahead(
+    executor: Executor, file_paths: List[Tuple[str, str]], window: int = READ_AHEAD
+) -> Iterator[Tuple[str, str, Future]]:
+    """
+    Submit reads to the executor, keeping at most `window` of them in flight,
+    and yield (abs_path, rel_path, future) in submission order
+    """
+    pending = deque()
+    for abs_path, rel_path in file_paths:
+        pending.append((abs_path, rel_path, executor.submit(_read_bytes, abs_path)))
+        if len(pending) >= window:
+            yield pending.popleft()
+    while pending:
+        yield pending.popleft()
 
 
-def combine_files(
-    file_paths: List[Tuple[str, str]],
+def iter_header(
     project_path: str,
     tree_content: List[str],
-    exclude_items: Set[str],
-    file_types: Set[str],
+    exclude_items: FrozenSet[str],
+    file_types: Tuple[str, ...],
     include_tree: bool = True,
-) -> str:
+) -> Iterator[bytes]:
     """
-    Combine all files with their location comments and optionally include tree structure
+    Yield the encoded header lines of the combined file, optionally
+    including the tree structure as comments
     """
-    combined_content = [
-        "# Combined Project Files",
-        f"# Project Path: {project_path}",
-        "# Generated by ProjectCombiner",
-        "#",
-        "# Excluded items (directories and files):",
-        f"# {', '.join(exclude_items) if exclude_items else 'None'}",
-        "#",
-        "# Included file types:",
-        f"# {', '.join(file_types) if file_types else 'All files'}",
-    ]
+    # Lines are separated, not terminated, by newlines; every file section
+    # written afterwards starts with its own newline
+    yield b"# Combined Project Files"
+    yield f"\n# Project Path: {project_path}".encode("utf-8")
+    yield b"\n# Generated by ProjectCombiner"
+    yield b"\n#"
+    yield b"\n# Excluded items (directories and files):"
+    yield f"\n# {', '.join(exclude_items) if exclude_items else 'None'}".encode(
+        "utf-8"
+    )
+    yield b"\n#"
+    yield b"\n# Included file types:"
+    yield f"\n# {', '.join(file_types) if file_types else 'All files'}".encode(
+        "utf-8"
+    )
 
     if include_tree:
         # Add tree structure as comments
-        combined_content.extend(["#", "# Project Structure:", "#"])
-        combined_content.extend(f"# {line}" for line in tree_content)
-        combined_content.extend(["#", "# File Contents:", "#"])
+        yield b"\n#\n# Project Structure:\n#"
+        # One join for the whole block instead of a string per line
+        yield ("\n# " + "\n# ".join(tree_content)).encode("utf-8")
+        yield b"\n#\n# File Contents:\n#"
+
+
+def write_combined(
+    out: BinaryIO,
+    file_paths: List[Tuple[str, str]],
+    executor: Optional[Executor] = None,
+    dedup: bool = False,
+):
+    """
+    Write all files with their location comments directly into the open
+    output file, copying them as raw bytes in their original order. If an
+    executor is given, source files are read ahead on it. With dedup, files
+    whose content was already written are replaced by a reference comment
+    """
+    # Loop invariants bound to locals once instead of per file
+    write = out.write
+    separator = b"#" * 80
+    file_open = b"\n" + separator + b"\n# File: "
+    file_close = b"\n" + separator + b"\n"
+
+    if executor is None:
+        sources = ((abs_path, rel_path, None) for abs_path, rel_path in file_paths)
+    else:
+        sources = _read_ahead(executor, file_paths)
+
+    # Content digest -> relative path of the first file with that content
+    seen: Dict[bytes, str] = {}
+
+    # Sources are compared against this so the output is never copied into
+    # itself, e.g. when it is left over inside the project from a previous run
+    out_stat = os.fstat(out.fileno())
 
     # Add all files
-    for abs_path, rel_path in file_paths:
+    for abs_path, rel_path, future in sources:
+        src = None
         try:
-            with open(abs_path, "r", encoding="utf-8") as f:
-                content = f.read()
-
-            # Add file separator and path information
-            combined_content.extend(
-                [
-                    "#" * 80,
-                    f"# File: {rel_path}",
-                    "#" * 80,
-                    content,
-                    "\n",  # Add newline between files
-                ]
-            )
+            st, content = future.result() if future is not None else (None, None)
+            if content is None:
+                src = open(abs_path, "rb", buffering=0)
+                st = os.fstat(src.fileno())
         except Exception as e:
+            if src is not None:
+                src.close()
             print(f"Warning: Error reading {abs_path}: {e}")
             continue
 
-    return "\n".join(combined_content)
+        if os.path.samestat(st, out_stat):
+            if src is not None:
+                src.close()
+            print(f"Skipping output file: {abs_path}")
+            continue
+
+        # Empty files all share one digest but there is nothing to save
+        if dedup and st.st_size:
+            if src is None:
+                digest = hashlib.sha256(content).digest()
+            else:
+                try:
+                    digest = _digest(src, st.st_size)
+                except Exception as e:
+                    src.close()
+                    print(f"Warning: Error reading {abs_path}: {e}")
+                    continue
+            original = seen.get(digest)
+            if original is not None:
+                if src is not None:
+                    src.close()
+                header = f"{rel_path} (identical to {original})"
+                write(file_open + header.encode("utf-8") + file_close + b"\n\n")
+                continue
+            seen[digest] = rel_path
+
+        # Add file separator and path information
+        write(file_open + rel_path.encode("utf-8") + file_close)
+        if src is None:
+            write(content)
+        else:
+            with src:
+                _copy_file(src, out, st.st_size)
+        write(b"\n\n")  # Add newline between files
 
 
 def main():
@@ -194,9 +446,12 @@ def main():
     args = parse_args()
     project_path = os.path.abspath(args.project_path)
     output_file = args.output_file
-    exclude_items = set(args.exclude)
+    exclude_items = args.exclude
     separate_tree = args.separate_tree
-    file_types = set(args.file_types) if args.file_types else set()
+    jobs = args.jobs
+    async_reads = args.async_reads
+    dedup = args.dedup
+    file_types = args.file_types
 
     # Print configuration
     print(f"\nConfiguration:")
@@ -204,47 +459,59 @@ def main():
     print(f"Output file: {output_file}")
     print(f"File types: {', '.join(file_types) if file_types else 'All files'}")
     print(f"Excluded items: {', '.join(exclude_items)}")
-    print(f"Separate tree file: {separate_tree}\n")
+    print(f"Separate tree file: {separate_tree}")
+    print(f"Scan jobs: {jobs}")
+    print(f"Async reads: {async_reads}")
+    print(f"Deduplicate identical files: {dedup}\n")
 
     # Ensure project path exists
     if not os.path.exists(project_path):
         print(f"Error: Path {project_path} does not exist")
         sys.exit(1)
 
-    # Generate tree structure
-    print("Generating directory tree...")
-    tree_content = generate_tree(project_path, exclude_items, file_types)
+    # Walk the project once for both the tree and the file list
+    print("Scanning project...")
+    scan_pool = ThreadPoolExecutor(max_workers=jobs) if jobs > 1 else nullcontext()
+    with scan_pool as executor:
+        tree_content, file_paths = walk_once(
+            project_path, exclude_items, file_types, executor
+        )
 
     # Save tree to separate file if requested
     if separate_tree:
         tree_file = output_file.rsplit(".", 1)[0] + "_tree.txt"
-        with open(tree_file, "w", encoding="utf-8") as f:
-            f.write("\n".join(tree_content))
+        with open(tree_file, "wb", buffering=IO_BUFFER) as f:
+            # Encode line by line instead of joining the whole tree first
+            lines = iter(tree_content)
+            f.write(next(lines).encode("utf-8"))
+            f.writelines(f"\n{line}".encode("utf-8") for line in lines)
         print(f"Directory tree saved to: {tree_file}")
 
-    # Scan for files
-    print("Scanning for files...")
-    file_paths = scan_directory(project_path, exclude_items, file_types)
-
     if not file_paths:
         print("Warning: No matching files found!")
         sys.exit(1)
 
-    # Combine files
+    # Combine files, streaming each one straight into the output
     print("Combining files...")
-    combined_content = combine_files(
-        file_paths,
-        project_path,
-        tree_content,
-        exclude_items,
-        file_types,
-        not separate_tree,  # Include tree in combined file only if not separate
-    )
-
-    # Save combined content
     try:
-        with open(output_file, "w", encoding="utf-8") as f:
-            f.write(combined_content)
+        if async_reads:
+            max_workers = min(32, (os.cpu_count() or 4) * 4)
+            read_pool = ThreadPoolExecutor(max_workers=max_workers)
+        else:
+            read_pool = nullcontext()
+        with read_pool as executor, open(
+            output_file, "wb", buffering=IO_BUFFER
+        ) as out:
+            out.writelines(
+                iter_header(
+                    project_path,
+                    tree_content,
+                    exclude_items,
+                    file_types,
+                    not separate_tree,  # Include tree in combined file only if not separate
+                )
+            )
+            write_combined(out, file_paths, executor, dedup)
         print(f"\nProcessed {len(file_paths)} files")
         print(f"Combined content saved to: {output_file}")
     except Exception as e: